@@ -14,7 +14,9 @@ import logging.handlers
 import threading
 
 import octoprint.plugin
+from octoprint.access.permissions import Permissions
 from octoprint.schema.webcam import RatioEnum, Webcam, WebcamCompatibility
+from octoprint.server.util import get_user_for_apikey
 from octoprint.webcams import WebcamNotAbleToTakeSnapshotException
 
 
@@ -34,8 +36,20 @@ class BambuWebCamPlugin(
 
     def on_startup(self, host, port):
         global encoderLock
+        global decodeLock
         encoderLock = threading.Lock()
+        decodeLock = threading.Lock()
         threading.Thread(target=web_server_thread, args=(self,)).start()
+        self._start_ingest()
+
+    def _start_ingest(self):
+        printerHost = self._settings.get(["printerHost"])
+        accessCode = self._settings.get(["printerAccessCode"])
+        if printerHost and accessCode:
+            camera_ingest_start(self, printerHost, accessCode)
+        else:
+            camera_ingest_stop()
+            self._logger.warn("printer host / access code not configured - camera ingest disabled")
         
     def get_assets(self):
         # return {
@@ -160,6 +174,12 @@ class BambuWebCamPlugin(
             r.raise_for_status()
             return r.iter_content(chunk_size=1024)
 
+    def is_admin_api_key(self, apikey):
+        if not apikey: return False
+        # covers user keys, the global key and application keys (keyvalidator hook) alike
+        user = get_user_for_apikey(apikey)
+        return user is not None and user.is_active and user.has_permission(Permissions.ADMIN)
+
     # ~~ SettingsPlugin API
 
     def get_settings_defaults(self):
@@ -175,11 +195,25 @@ class BambuWebCamPlugin(
             cacheBuster=False,
             snapshotSslValidation=True,
             snapshotTimeout=5,
+            printerHost="",
+            printerAccessCode="",
         )
 
+    def get_settings_restricted_paths(self):
+        return dict(admin=[["printerAccessCode"]])
+
     def get_settings_version(self):
         return 1
 
+    def on_settings_save(self, data):
+        printerHost = self._settings.get(["printerHost"])
+        accessCode = self._settings.get(["printerAccessCode"])
+
+        octoprint.plugin.SettingsPlugin.on_settings_save(self, data)
+
+        if printerHost != self._settings.get(["printerHost"]) or accessCode != self._settings.get(["printerAccessCode"]):
+            self._start_ingest()
+
     # def on_settings_migrate(self, target, current):
     #     if current is None:
     #         config = self._settings.global_get(["webcam"])
@@ -281,6 +315,7 @@ import json
 
 import struct
 import ssl
+import queue
 
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from socketserver import ThreadingMixIn
@@ -291,13 +326,36 @@ from io import BytesIO
 exitCode = os.EX_OK
 myargs = None
 webserver = None
+lastFrame = None
 lastImage = None
+lastImageSeq = -1
+frameSequence = 0
 encoderLock = None
+decodeLock = None
+ingest = None
 encodeFps = 0.0
 streamFps = {}
 snapshots = 0
+sessionThreads = {}
+profileLock = threading.Lock()
+
+PROFILE_INTERVAL = 0.01
+PROFILE_MAX_SECONDS = 60
+
+FIRST_FRAME_TIMEOUT = 5
 
 class WebRequestHandler(BaseHTTPRequestHandler):
+    def handle(self):
+        global sessionThreads
+
+        # remember which threads are serving clients so the profiler can find them
+        nativeId = threading.get_native_id() if hasattr(threading, "get_native_id") else None
+        sessionThreads[threading.get_ident()] = ("session %s:%d" % (self.client_address[0], self.client_address[1]), nativeId)
+        try:
+            super().handle()
+        finally:
+            sessionThreads.pop(threading.get_ident(), None)
+
     def do_GET(self):
         global exitCode
         global myargs
@@ -351,10 +409,24 @@ class WebRequestHandler(BaseHTTPRequestHandler):
             else:
                 fpsavg = 0.
 
-            jsonstr = ('{"stats":{"server": "%s", "encodeFps": %.2f, "sessionCount": %d, "avgStreamFps": %.2f, "sessions": %s, "snapshots": %d}, "config": %s}' % (host, self.server.getEncodeFps(), len(streamFps), fpsavg, json.dumps(streamFps) if len(streamFps) > 0 else "{}", snapshots, json.dumps(vars(myargs))))
+            jsonstr = ('{"stats":{"server": "%s", "encodeFps": %.2f, "sessionCount": %d, "avgStreamFps": %.2f, "sessions": %s, "snapshots": %d, "ingest": %s}, "config": %s}' % (host, self.server.getEncodeFps(), len(streamFps), fpsavg, json.dumps(streamFps) if len(streamFps) > 0 else "{}", snapshots, json.dumps(ingest.getStats() if not ingest is None else {}), json.dumps(vars(myargs))))
             self.wfile.write(jsonstr.encode("utf-8"))
             return
 
+        if self.path.lower().startswith("/?profile"):
+            qs = parse_qs(urlparse(self.path).query)
+            # header only - anything in the query string ends up in the request line and the http log
+            if not self.server.plugin.is_admin_api_key(self.headers.get("X-Api-Key")):
+                self.send_error(403, "Forbidden", "An admin API key is required in the X-Api-Key header.")
+                return
+            try:
+                seconds = float(qs["seconds"][0]) if "seconds" in qs else 10.
+            except ValueError:
+                self.send_error(400, "Bad Request", "seconds must be a number.")
+                return
+            self.sendProfile(min(max(seconds, PROFILE_INTERVAL), PROFILE_MAX_SECONDS), collapsedOnly="collapsed" in self.path.lower())
+            return
+
         if self.path.lower().startswith("/?shutdown"):
             self.send_response(200)
             self.send_header("Content-type", "text/html")
@@ -379,7 +451,9 @@ class WebRequestHandler(BaseHTTPRequestHandler):
             "<html><head><title>webcamd - A High Performance MJPEG HTTP Server</title></head><body>Specify <a href='http://" + host +
             "/?stream'>/?stream</a> to stream, <a href='http://" + host +
             "/?snapshot'>/?snapshot</a> for a picture, or <a href='http://" + host +
-            "/?info'>/?info</a> for statistics and configuration information</body></html>").encode("utf-8"))
+            "/?info'>/?info</a> for statistics and configuration information." +
+            "<p>To profile the server, send an admin API key in the X-Api-Key header, e.g. " +
+            "<code>curl -H 'X-Api-Key: &lt;key&gt;' 'http://" + host + "/?profile&amp;seconds=10'</code></p></body></html>").encode("utf-8"))
 
     def log_message(self, format, *args):
         global myargs
@@ -388,11 +462,19 @@ class WebRequestHandler(BaseHTTPRequestHandler):
 
 
     def streamVideo(self, rotate=-1, showFps = False):
+        # open the session first - that is what wakes the ingest up to fetch a frame
+        self.server.addSession()
+        try:
+            self.sendStream(rotate=rotate, showFps=showFps)
+        finally:
+            self.server.dropSession()
+
+    def sendStream(self, rotate=-1, showFps = False):
         global myargs
         global streamFps
 
         try:
-            if self.server.getImage() is None:
+            if self.server.waitForImage(FIRST_FRAME_TIMEOUT) is None:
                 self.send_response(200)
                 self.send_header("Content-type", "text/html")
                 self.end_headers()
@@ -404,11 +486,10 @@ class WebRequestHandler(BaseHTTPRequestHandler):
             self.send_header("Content-type", "multipart/x-mixed-replace; boundary=boundarydonotcross")
             self.end_headers()
         except Exception as e:
-            print("%s: error in stream header %s: [%s]" % (datetime.datetime.now(), streamKey, e), flush=True)
+            print("%s: error in stream header %s: [%s]" % (datetime.datetime.now(), self.client_address[0], e), flush=True)
             return
 
         frames = 0
-        self.server.addSession()
         streamKey = ("%s:%d" % (socket.getnameinfo((self.client_address[0], 0), 0)[0], self.client_address[1]))
 
         fpsFont = ImageFont.truetype("SourceCodePro-Regular.ttf", 14)
@@ -429,6 +510,10 @@ class WebRequestHandler(BaseHTTPRequestHandler):
 
             jpg = self.server.getImage()
 
+            if jpg is None:
+                time.sleep(myargs.streamwait)
+                continue
+
             if rotate != -1: jpg = jpg.rotate(rotate)
 
             if showFps and primed: 
@@ -473,22 +558,42 @@ class WebRequestHandler(BaseHTTPRequestHandler):
                 break
 
         if streamKey in streamFps: streamFps.pop(streamKey)
-        self.server.dropSession()
 
-    def sendSnapshot(self, rotate=-1):
+    def sendProfile(self, seconds, collapsedOnly=False):
+        if not profileLock.acquire(blocking=False):
+            self.send_error(409, "Conflict", "A profile is already running.")
+            return
+
         try:
-            jpg = self.server.getImage()
+            profile = sample_threads(seconds)
+        finally:
+            profileLock.release()
 
-            if jpg is None:
-                self.send_error(425, "Too Early", "The server is not yet ready to serve requests.  Please try again momentarily.")
-                return
+        if collapsedOnly:
+            body = "\n".join(profile["collapsed"]).encode("utf-8")
+            contentType = "text/plain"
+        else:
+            body = json.dumps(profile).encode("utf-8")
+            contentType = "text/json"
 
+        try:
             self.send_response(200)
-            self.send_header("Content-type", "image/jpeg")
-            self.send_header("Content-length", str(len(tmpFile.getvalue())))
+            self.send_header("Content-type", contentType)
+            self.send_header("Content-length", str(len(body)))
             self.end_headers()
+            self.wfile.write(body)
+        except Exception as e:
+            print(f"{datetime.datetime.now()}: error in profile: [{e}]", flush=True)
 
-            self.server.addSession()
+    def sendSnapshot(self, rotate=-1):
+        self.server.addSession()
+
+        try:
+            jpg = self.server.waitForImage(FIRST_FRAME_TIMEOUT)
+
+            if jpg is None:
+                self.send_error(425, "Too Early", "The server is not yet ready to serve requests.  Please try again momentarily.")
+                return
 
             if rotate != -1: jpg = jpg.rotate(rotate)
             fpsFont = ImageFont.truetype("SourceCodePro-Regular.ttf", 14)
@@ -506,11 +611,16 @@ class WebRequestHandler(BaseHTTPRequestHandler):
             tmpFile = BytesIO()
             jpg.save(tmpFile, "JPEG")
 
+            self.send_response(200)
+            self.send_header("Content-type", "image/jpeg")
+            self.send_header("Content-length", str(len(tmpFile.getvalue())))
+            self.end_headers()
+
             self.wfile.write(tmpFile.getvalue())
         except Exception as e:
             print(f"{datetime.datetime.now()}: error in snapshot: [{e}]", flush=True)
-
-        self.server.dropSession()
+        finally:
+            self.server.dropSession()
 
 def web_server_thread(_plugin):
     global exitCode
@@ -519,6 +629,9 @@ def web_server_thread(_plugin):
     global encoderLock
     global encodeFps
 
+    # there is no command line inside OctoPrint, so seed the webcamd style options here
+    myargs = argparse.Namespace(loghttp=False, rotate=-1, showfps=False, streamwait=0.01, encodewait=0.01)
+
     try:
         # if myargs.ipv == 4:
         #     webserver = ThreadingHTTPServer((myargs.v4bindaddress, myargs.port), WebRequestHandler)
@@ -526,6 +639,7 @@ def web_server_thread(_plugin):
         #     webserver = ThreadingHTTPServerV6((myargs.v6bindaddress, myargs.port), WebRequestHandler)
 
         webserver = ThreadingHTTPServer(("0.0.0.0", 8081), WebRequestHandler)
+        webserver.plugin = _plugin
 
         _plugin._logger.warn("web server started")
         webserver.serve_forever()
@@ -535,9 +649,103 @@ def web_server_thread(_plugin):
 
     print(f"{datetime.datetime.now()}: web server thread died", flush=True)
 
+def profiled_threads():
+    global sessionThreads
+
+    # the requesting session is busy sampling, so leave it out of its own profile
+    me = threading.get_ident()
+    threads = {ident: session for ident, session in list(sessionThreads.items()) if ident != me}
+    for thread in threading.enumerate():
+        if thread.name.startswith("bambuwebcam-"):
+            threads[thread.ident] = (thread.name, getattr(thread, "native_id", None))
+    return threads
+
+def thread_cpu_time(nativeId):
+    # go through /proc by kernel task id: session threads come and go constantly and an
+    # exited one just fails with ENOENT here, where a stale pthread_t would be undefined behaviour
+    if nativeId is None: return None
+    try:
+        with open(f"/proc/self/task/{nativeId}/schedstat") as f:
+            return int(f.read().split()[0]) / 1e9
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/self/task/{nativeId}/stat") as f:
+            stat = f.read()
+        fields = stat[stat.rfind(")") + 2:].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def sample_threads(seconds, interval=PROFILE_INTERVAL):
+    """
+    Poor man's sampling profiler: every interval grab the stacks of the session and
+    ingest threads via sys._current_frames() and count identical stacks, which keeps
+    the cost to a few microseconds per sample instead of tracing every call.
+    """
+    stacks = {}
+    threads = {}
+    samples = 0
+
+    startTime = time.time()
+    while time.time() < startTime + seconds:
+        targets = profiled_threads()
+        frames = sys._current_frames()
+
+        for ident, (name, nativeId) in targets.items():
+            frame = frames.get(ident)
+            if frame is None: continue
+
+            stack = []
+            while not frame is None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(name)
+            key = ";".join(reversed(stack))
+            stacks[key] = stacks.get(key, 0) + 1
+
+            # idents get recycled by short lived session threads, the name (client port) does not.
+            # cpu time is only read when a thread shows up and once more at the end, keeping /proc
+            # out of the sampling loop
+            thread = threads.get((ident, name))
+            if thread is None:
+                thread = threads[(ident, name)] = {"samples": 0, "nativeId": nativeId, "cpuStart": thread_cpu_time(nativeId)}
+            thread["samples"] = thread["samples"] + 1
+
+        frames = None
+        samples = samples + 1
+        time.sleep(interval)
+
+    elapsed = time.time() - startTime
+
+    # threads that finished during the window have no end reading and report None
+    alive = profiled_threads()
+
+    threadStats = {}
+    for (ident, name), thread in threads.items():
+        cpuSeconds = None
+        cpuEnd = thread_cpu_time(thread["nativeId"]) if ident in alive and alive[ident][0] == name else None
+        if not thread["cpuStart"] is None and not cpuEnd is None:
+            cpuSeconds = round(cpuEnd - thread["cpuStart"], 4)
+        threadStats["%s [%d]" % (name, ident)] = {
+            "samples": thread["samples"],
+            "cpuSeconds": cpuSeconds,
+            "cpuPercent": round(cpuSeconds / elapsed * 100., 1) if not cpuSeconds is None else None,
+        }
+
+    return {
+        "seconds": round(elapsed, 3),
+        "interval": interval,
+        "samples": samples,
+        "threads": threadStats,
+        "collapsed": ["%s %d" % (stack, count) for stack, count in sorted(stacks.items(), key=lambda s: -s[1])],
+    }
+
 class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
     running = True
     sessions = 0
+    plugin = None
 
     def __init__(self, mixin, server):
         global encoderLock
@@ -545,11 +753,41 @@ class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
         super().__init__(mixin, server)
 
     def getImage(self):
+        global lastFrame
         global lastImage
-        if not lastImage is None:
-            return lastImage.copy()
-        else:
-            return None
+        global lastImageSeq
+        global decodeLock
+
+        # the publisher only swaps in raw jpeg bytes; the first session to ask for
+        # pixels of a new frame pays for the decode and everyone else shares it
+        frame = lastFrame
+        if frame is None: return None
+
+        seq, jpg = frame
+        with decodeLock:
+            if seq != lastImageSeq:
+                # advance even if the decode fails so a corrupt frame is only tried once
+                lastImageSeq = seq
+                startTime = time.perf_counter()
+                try:
+                    image = Image.open(BytesIO(jpg))
+                    image.load()
+                    lastImage = image
+                    if not ingest is None: ingest.decodeTimer.record(time.perf_counter() - startTime)
+                except Exception as e:
+                    if not ingest is None: ingest.decodeFailures = ingest.decodeFailures + 1
+                    print(f"{datetime.datetime.now()}: unable to decode frame {seq}: [{e}]", flush=True)
+            image = lastImage
+
+        return image.copy() if not image is None else None
+
+    def waitForImage(self, timeout):
+        startTime = time.time()
+        jpg = self.getImage()
+        while jpg is None and self.running and time.time() < startTime + timeout:
+            time.sleep(0.1)
+            jpg = self.getImage()
+        return jpg
         
     def die(self):
         super().shutdown()
@@ -579,4 +817,245 @@ class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
         return encodeFps
 
 class ThreadingHTTPServerV6(ThreadingHTTPServer):
-        address_family = socket.AF_INET6
\ No newline at end of file
+        address_family = socket.AF_INET6
+
+BAMBU_CAMERA_PORT = 6000
+BAMBU_FRAME_HEADER = struct.Struct("<IIII")
+BAMBU_MAX_FRAME_SIZE = 8 * 1024 * 1024
+JPEG_START = b"\xff\xd8\xff\xe0"
+JPEG_END = b"\xff\xd9"
+
+def camera_ingest_start(_plugin, host, accessCode):
+    global ingest
+
+    camera_ingest_stop()
+    ingest = CameraIngest(_plugin, host, accessCode)
+    ingest.start()
+
+def camera_ingest_stop():
+    global ingest
+    global lastFrame
+    global lastImage
+
+    if not ingest is None:
+        ingest.stop()
+        ingest = None
+
+    # whatever the old printer sent last must not outlive its ingest
+    lastFrame = None
+    with decodeLock:
+        lastImage = None
+
+class StageTimer:
+    def __init__(self):
+        self.count = 0
+        self.lastMs = 0.
+        self.avgMs = 0.
+
+    def record(self, seconds):
+        ms = seconds * 1000.
+        self.lastMs = ms
+        self.avgMs = ms if self.count == 0 else self.avgMs * 0.9 + ms * 0.1
+        self.count = self.count + 1
+
+    def getStats(self):
+        return {"count": self.count, "lastMs": round(self.lastMs, 3), "avgMs": round(self.avgMs, 3)}
+
+class CameraIngest:
+    """
+    Two stage ingest of the printer's camera feed.
+
+    The reader stage owns the TLS socket and does nothing but pull length prefixed
+    frames into a reusable buffer, so a slow consumer can never stall the socket.
+    The publisher stage validates each frame and swaps it into lastFrame; decoding
+    is left to ThreadingHTTPServer.getImage() when a session actually wants pixels.
+    """
+
+    def __init__(self, _plugin, host, accessCode, queueSize=2):
+        self.plugin = _plugin
+        self.host = host
+        self.accessCode = accessCode
+        self.running = True
+        self.conn = None
+        self.connected = False
+        self.connects = 0
+        self.framesPublished = 0
+        self.publisher = None
+        self.framesDropped = 0
+        self.framesInvalid = 0
+        self.decodeFailures = 0
+        self.frames = queue.Queue(maxsize=queueSize)
+        self.header = bytearray(BAMBU_FRAME_HEADER.size)
+        self.buffer = bytearray(256 * 1024)
+        self.readTimer = StageTimer()
+        self.publishTimer = StageTimer()
+        self.decodeTimer = StageTimer()
+
+    def start(self):
+        threading.Thread(target=self.readerThread, name="bambuwebcam-reader", daemon=True).start()
+        self.publisher = threading.Thread(target=self.publisherThread, name="bambuwebcam-publisher", daemon=True)
+        self.publisher.start()
+
+    def stop(self):
+        self.running = False
+        # unblock a reader sitting in recv_into() so the old connection goes away now
+        conn = self.conn
+        if not conn is None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+
+        # the reader only ever touches its own queue, but the publisher writes lastFrame,
+        # so make sure it is gone before anyone starts a replacement
+        try:
+            self.frames.put_nowait(None)
+        except queue.Full:
+            pass
+        if not self.publisher is None:
+            self.publisher.join(timeout=5)
+
+    def authPacket(self):
+        return struct.pack("<IIII32s32s", 0x40, 0x3000, 0, 0, b"bblp", self.accessCode.encode("ascii"))
+
+    def connect(self):
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+
+        sock = socket.create_connection((self.host, BAMBU_CAMERA_PORT), timeout=10)
+        conn = ctx.wrap_socket(sock, server_hostname=self.host)
+        conn.sendall(self.authPacket())
+        return conn
+
+    def readInto(self, conn, view):
+        got = 0
+        while got < len(view):
+            n = conn.recv_into(view[got:])
+            if n == 0: raise ConnectionError("camera closed the connection")
+            got = got + n
+
+    def handoff(self, frame):
+        # never block the reader - if the publisher is behind, the oldest frame loses
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.framesDropped = self.framesDropped + 1
+                except queue.Empty:
+                    pass
+
+    def readerThread(self):
+        headerView = memoryview(self.header)
+
+        while self.running:
+            # like the webcamd encoder, only pull from the printer while a session is open
+            if encoderLock.locked():
+                time.sleep(0.1)
+                continue
+
+            conn = None
+            try:
+                conn = self.connect()
+                self.conn = conn
+                self.connected = True
+                self.connects = self.connects + 1
+                print(f"{datetime.datetime.now()}: camera ingest connected to {self.host}:{BAMBU_CAMERA_PORT}", flush=True)
+
+                while self.running and not encoderLock.locked():
+                    self.readInto(conn, headerView)
+                    startTime = time.perf_counter()
+
+                    size = BAMBU_FRAME_HEADER.unpack_from(self.header)[0]
+                    if size == 0 or size > BAMBU_MAX_FRAME_SIZE:
+                        raise ValueError(f"invalid frame size {size}")
+                    if size > len(self.buffer):
+                        self.buffer = bytearray(size)
+
+                    view = memoryview(self.buffer)[:size]
+                    self.readInto(conn, view)
+                    # the buffer is reused for the next frame, so this is the one copy a frame gets
+                    self.handoff(bytes(view))
+                    view.release()
+
+                    self.readTimer.record(time.perf_counter() - startTime)
+            except Exception as e:
+                print(f"{datetime.datetime.now()}: camera ingest error: [{e}]", flush=True)
+                failed = True
+            else:
+                failed = False
+                print(f"{datetime.datetime.now()}: camera ingest disconnected from {self.host}:{BAMBU_CAMERA_PORT}", flush=True)
+
+            self.connected = False
+            self.conn = None
+            if not conn is None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            if self.running and failed: time.sleep(5)
+
+    def publisherThread(self):
+        global lastFrame
+        global frameSequence
+        global encodeFps
+
+        frames = 0
+        startTime = time.time()
+
+        while self.running:
+            try:
+                frame = self.frames.get(timeout=1)
+            except queue.Empty:
+                frame = None
+
+            if frame is None or encoderLock.locked():
+                # nobody is watching (or the printer went quiet) - don't leave a stale frame around
+                # and start a fresh fps window once frames flow again
+                if encoderLock.locked(): lastFrame = None
+                frames = 0
+                startTime = time.time()
+                continue
+
+            publishStart = time.perf_counter()
+
+            if not frame.startswith(JPEG_START) or not frame.endswith(JPEG_END):
+                self.framesInvalid = self.framesInvalid + 1
+                continue
+
+            if not self.running: break
+
+            # a single reference swap, so readers always see a matching (sequence, jpeg) pair.
+            # the sequence is module wide so a restarted ingest never reuses one getImage() has seen
+            frameSequence = frameSequence + 1
+            lastFrame = (frameSequence, frame)
+            self.framesPublished = self.framesPublished + 1
+
+            self.publishTimer.record(time.perf_counter() - publishStart)
+
+            frames = frames + 1
+            if time.time() > startTime + 5:
+                encodeFps = frames / (time.time() - startTime)
+                frames = 0
+                startTime = time.time()
+
+    def getStats(self):
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "queueDepth": self.frames.qsize(),
+            "queueSize": self.frames.maxsize,
+            "bufferBytes": len(self.buffer),
+            "framesPublished": self.framesPublished,
+            "framesDropped": self.framesDropped,
+            "framesInvalid": self.framesInvalid,
+            "decodeFailures": self.decodeFailures,
+            "stages": {
+                "read": self.readTimer.getStats(),
+                "publish": self.publishTimer.getStats(),
+                "decode": self.decodeTimer.getStats(),
+            },
+        }
@@ -30,6 +30,9 @@ $(function () {
                 self.settings.settings.plugins.bambuwebcam.streamWebrtcIceServers;
             self.streamWebrtcIceServersText = ko.observable("");
             self.cacheBuster = self.settings.settings.plugins.bambuwebcam.cacheBuster;
+            self.printerHost = self.settings.settings.plugins.bambuwebcam.printerHost;
+            self.printerAccessCode =
+                self.settings.settings.plugins.bambuwebcam.printerAccessCode;
             self.available_ratios = ["16:9", "4:3"];
 
             self.webRtcServersToText();